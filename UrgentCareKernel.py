@@ -0,0 +1,435 @@
+import sys
+
+import numpy as np
+
+import DESInputData as D
+from ModelEvents import Priority
+
+# numba is optional; without it the kernel below runs as plain Python
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """ no-op replacement for numba.njit """
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# event types stored in the array-based simulation calendar
+EVENT_ARRIVAL = 0
+EVENT_END_OF_EXAM = 1
+EVENT_CLOSE = 2
+
+# priorities of the events (same as the object engine)
+PRIORITY_ARRIVAL = Priority.ARRIVAL.value
+PRIORITY_END_OF_EXAM = Priority.END_OF_EXAM.value
+PRIORITY_CLOSE = Priority.CLOSE.value
+
+# rows of the sample path statistics
+PATH_WAITING = 0        # number of patients waiting
+PATH_IN_SYSTEM = 1      # number of patients in the urgent care
+PATH_BUSY = 2           # number of physicians busy
+
+# columns of the sample path statistics
+STAT_VALUE = 0          # current value of the sample path
+STAT_LAST_TIME = 1      # time of the last update
+STAT_AREA = 2           # area under the sample path (after warm-up)
+STAT_MAX = 3            # maximum of the sample path (after warm-up)
+NO_MAX = -sys.float_info.max     # maximum before any observation (as in deampy)
+
+
+@njit(cache=True)
+def _precedes(cal_time, cal_priority, cal_seq, i, j):
+    """
+    :returns: True if the event at position i of the calendar should be processed before the event at position j
+    """
+    if cal_time[i] != cal_time[j]:
+        return cal_time[i] < cal_time[j]
+    if cal_priority[i] != cal_priority[j]:
+        return cal_priority[i] < cal_priority[j]
+    return cal_seq[i] < cal_seq[j]
+
+
+@njit(cache=True)
+def _swap(cal_time, cal_priority, cal_seq, cal_type, cal_arg, i, j):
+    """ swaps the events at positions i and j of the calendar """
+    cal_time[i], cal_time[j] = cal_time[j], cal_time[i]
+    cal_priority[i], cal_priority[j] = cal_priority[j], cal_priority[i]
+    cal_seq[i], cal_seq[j] = cal_seq[j], cal_seq[i]
+    cal_type[i], cal_type[j] = cal_type[j], cal_type[i]
+    cal_arg[i], cal_arg[j] = cal_arg[j], cal_arg[i]
+
+
+@njit(cache=True)
+def _push_event(cal_time, cal_priority, cal_seq, cal_type, cal_arg, n_events, seq,
+                time, priority, event_type, arg):
+    """ adds an event to the calendar (a binary heap)
+    :returns: the number of events in the calendar
+    """
+
+    i = n_events
+    cal_time[i] = time
+    cal_priority[i] = priority
+    cal_seq[i] = seq
+    cal_type[i] = event_type
+    cal_arg[i] = arg
+
+    # sift up
+    while i > 0:
+        parent = (i - 1) // 2
+        if _precedes(cal_time, cal_priority, cal_seq, i, parent):
+            _swap(cal_time, cal_priority, cal_seq, cal_type, cal_arg, i, parent)
+            i = parent
+        else:
+            break
+
+    return n_events + 1
+
+
+@njit(cache=True)
+def _pop_event(cal_time, cal_priority, cal_seq, cal_type, cal_arg, n_events):
+    """ removes the next event from the calendar (a binary heap)
+    :returns: (time, event type, event argument) of the removed event
+    """
+
+    time = cal_time[0]
+    event_type = cal_type[0]
+    arg = cal_arg[0]
+
+    # move the last event to the root and sift down
+    last = n_events - 1
+    _swap(cal_time, cal_priority, cal_seq, cal_type, cal_arg, 0, last)
+    i = 0
+    while True:
+        smallest = i
+        left = 2 * i + 1
+        right = left + 1
+        if left < last and _precedes(cal_time, cal_priority, cal_seq, left, smallest):
+            smallest = left
+        if right < last and _precedes(cal_time, cal_priority, cal_seq, right, smallest):
+            smallest = right
+        if smallest == i:
+            break
+        _swap(cal_time, cal_priority, cal_seq, cal_type, cal_arg, i, smallest)
+        i = smallest
+
+    return time, event_type, arg
+
+
+@njit(cache=True)
+def _record_increment(stats, path, time, increment, warm_up_period):
+    """ updates the statistics of a sample path
+    (same as deampy's ContinuousTimeStat with the 'step' method and the initial time set to the warm-up period)
+    :param stats: sample path statistics
+    :param path: row of the sample path
+    :param time: current time
+    :param increment: change in the value of the sample path
+    :param warm_up_period: warm up period
+    """
+
+    if time < warm_up_period:
+        stats[path, STAT_LAST_TIME] = time
+        stats[path, STAT_VALUE] += increment
+        return
+
+    last_time = max(stats[path, STAT_LAST_TIME], warm_up_period)
+    if stats[path, STAT_VALUE] > stats[path, STAT_MAX]:
+        stats[path, STAT_MAX] = stats[path, STAT_VALUE]
+    stats[path, STAT_AREA] += stats[path, STAT_VALUE] * (time - last_time)
+    stats[path, STAT_LAST_TIME] = time
+    stats[path, STAT_VALUE] += increment
+
+
+@njit(cache=True)
+def simulate_kernel(variates, sim_duration, hours_open, n_physicians,
+                    arrival_scale, arrival_loc, exam_scale, exam_loc, warm_up_period):
+    """ simulates the urgent care over arrays
+    (same arrival, end of exam and closing logic as the object engine in ModelEntities.py)
+    :param variates: standard exponential random variates (used in the same order as the object engine)
+    :param sim_duration: duration of simulation (hours)
+    :param hours_open: hours the urgent care is open
+    :param n_physicians: number of physicians
+    :param arrival_scale: scale of the exponential inter-arrival time distribution
+    :param arrival_loc: location of the exponential inter-arrival time distribution
+    :param exam_scale: scale of the exponential exam duration distribution
+    :param exam_loc: location of the exponential exam duration distribution
+    :param warm_up_period: warm up period (hours)
+    :returns: (if the variates ran out, number of patients arrived, number of patients served,
+               patients time in system, patients time in the waiting room, sample path statistics, simulation time)
+    """
+
+    n_variates = len(variates)
+    i_variate = 0
+    ran_out = False
+
+    # simulation calendar (at most one arrival, one closing and one end of exam per physician)
+    cal_size = n_physicians + 2
+    cal_time = np.empty(cal_size, dtype=np.float64)
+    cal_priority = np.empty(cal_size, dtype=np.int64)
+    cal_seq = np.empty(cal_size, dtype=np.int64)
+    cal_type = np.empty(cal_size, dtype=np.int64)
+    cal_arg = np.empty(cal_size, dtype=np.int64)
+    n_events = 0
+    seq = 0
+    time = 0.0
+
+    # every patient's arrival uses one variate, so this bounds the number of patients
+    max_patients = n_variates + 1
+    t_arrived = np.empty(max_patients, dtype=np.float64)
+    t_joined_waiting_room = np.full(max_patients, np.nan)
+    t_left_waiting_room = np.empty(max_patients, dtype=np.float64)
+
+    # waiting room (a patient joins at most once, so the queue never wraps)
+    waiting_room = np.empty(max_patients, dtype=np.int64)
+    head = 0
+    tail = 0
+
+    # physicians
+    patient_being_served = np.full(n_physicians, -1, dtype=np.int64)
+
+    # outputs
+    n_patients_arrived = 0
+    n_patients_served = 0
+    time_in_system = np.empty(max_patients, dtype=np.float64)
+    time_in_waiting_room = np.empty(max_patients, dtype=np.float64)
+    stats = np.zeros((3, 4), dtype=np.float64)
+    stats[:, STAT_LAST_TIME] = warm_up_period
+    stats[:, STAT_MAX] = NO_MAX
+
+    if_open = True
+
+    # schedule the closing event
+    n_events = _push_event(cal_time, cal_priority, cal_seq, cal_type, cal_arg, n_events, seq,
+                           hours_open, PRIORITY_CLOSE, EVENT_CLOSE, 0)
+    seq += 1
+
+    # schedule the arrival of the first patient
+    if n_variates == 0:
+        return True, 0, 0, time_in_system[:0], time_in_waiting_room[:0], stats, time
+    n_events = _push_event(cal_time, cal_priority, cal_seq, cal_type, cal_arg, n_events, seq,
+                           variates[i_variate] * arrival_scale + arrival_loc, PRIORITY_ARRIVAL, EVENT_ARRIVAL, 0)
+    i_variate += 1
+    seq += 1
+
+    while n_events > 0 and time <= sim_duration:
+
+        time, event_type, arg = _pop_event(cal_time, cal_priority, cal_seq, cal_type, cal_arg, n_events)
+        n_events -= 1
+
+        if event_type == EVENT_ARRIVAL:
+            patient = arg
+
+            # do not admit the patient if the urgent care is closed
+            if not if_open:
+                continue
+
+            # collect statistics on new patient
+            if time > warm_up_period:
+                n_patients_arrived += 1
+            _record_increment(stats, PATH_IN_SYSTEM, time, 1.0, warm_up_period)
+            t_arrived[patient] = time
+
+            # find an idle physician if no one is waiting
+            physician = -1
+            if tail == head:
+                for i in range(n_physicians):
+                    if patient_being_served[i] < 0:
+                        physician = i
+                        break
+
+            if physician < 0:
+                # add the patient to the waiting room
+                t_joined_waiting_room[patient] = time
+                _record_increment(stats, PATH_WAITING, time, 1.0, warm_up_period)
+                waiting_room[tail] = patient
+                tail += 1
+            else:
+                # start the exam
+                if i_variate == n_variates:
+                    ran_out = True
+                    break
+                patient_being_served[physician] = patient
+                _record_increment(stats, PATH_BUSY, time, 1.0, warm_up_period)
+                n_events = _push_event(cal_time, cal_priority, cal_seq, cal_type, cal_arg, n_events, seq,
+                                       time + (variates[i_variate] * exam_scale + exam_loc),
+                                       PRIORITY_END_OF_EXAM, EVENT_END_OF_EXAM, physician)
+                i_variate += 1
+                seq += 1
+
+            # schedule the arrival of the next patient
+            if i_variate == n_variates:
+                ran_out = True
+                break
+            n_events = _push_event(cal_time, cal_priority, cal_seq, cal_type, cal_arg, n_events, seq,
+                                   time + (variates[i_variate] * arrival_scale + arrival_loc),
+                                   PRIORITY_ARRIVAL, EVENT_ARRIVAL, patient + 1)
+            i_variate += 1
+            seq += 1
+
+        elif event_type == EVENT_END_OF_EXAM:
+            physician = arg
+            patient = patient_being_served[physician]
+
+            # remove the patient
+            patient_being_served[physician] = -1
+            if np.isnan(t_joined_waiting_room[patient]):
+                time_waiting = 0.0
+            else:
+                time_waiting = t_left_waiting_room[patient] - t_joined_waiting_room[patient]
+            _record_increment(stats, PATH_IN_SYSTEM, time, -1.0, warm_up_period)
+            _record_increment(stats, PATH_BUSY, time, -1.0, warm_up_period)
+            if time > warm_up_period:
+                time_in_waiting_room[n_patients_served] = time_waiting
+                time_in_system[n_patients_served] = time - t_arrived[patient]
+                n_patients_served += 1
+
+            # start serving the next patient in line
+            if tail > head:
+                if i_variate == n_variates:
+                    ran_out = True
+                    break
+                patient = waiting_room[head]
+                head += 1
+                t_left_waiting_room[patient] = time
+                _record_increment(stats, PATH_WAITING, time, -1.0, warm_up_period)
+                patient_being_served[physician] = patient
+                _record_increment(stats, PATH_BUSY, time, 1.0, warm_up_period)
+                n_events = _push_event(cal_time, cal_priority, cal_seq, cal_type, cal_arg, n_events, seq,
+                                       time + (variates[i_variate] * exam_scale + exam_loc),
+                                       PRIORITY_END_OF_EXAM, EVENT_END_OF_EXAM, physician)
+                i_variate += 1
+                seq += 1
+
+        else:
+            # close the urgent care
+            if_open = False
+
+    # close the sample paths
+    for path in range(3):
+        _record_increment(stats, path, time, 0.0, warm_up_period)
+
+    return (ran_out, n_patients_arrived, n_patients_served,
+            time_in_system[:n_patients_served], time_in_waiting_room[:n_patients_served], stats, time)
+
+
+class KernelOutputs:
+    # outputs of a simulation run of the compiled kernel
+
+    def __init__(self, warm_up_period, n_patients_arrived, n_patients_served,
+                 time_in_system, time_in_waiting_room, path_stats, sim_time):
+        """
+        :param warm_up_period: warm up period (hours)
+        :param n_patients_arrived: number of patients arrived (after warm-up)
+        :param n_patients_served: number of patients served (after warm-up)
+        :param time_in_system: observations on patients time in urgent care
+        :param time_in_waiting_room: observations on patients time in the waiting room
+        :param path_stats: statistics of the sample paths (rows: waiting, in system, physicians busy)
+        :param sim_time: simulation time when the simulation ended
+        """
+
+        self.warmUpPeriod = warm_up_period
+        self.nPatientsArrived = n_patients_arrived
+        self.nPatientsServed = n_patients_served
+        self.patientTimeInSystem = list(time_in_system)
+        self.patientTimeInWaitingRoom = list(time_in_waiting_room)
+        self.pathStats = path_stats
+        self.simTime = sim_time
+
+    def get_ave_patient_time_in_system(self):
+        """
+        :return: average patient time in system
+        """
+
+        return sum(self.patientTimeInSystem)/len(self.patientTimeInSystem)
+
+    def get_ave_patient_waiting_time(self):
+        """
+        :return: average patient waiting time
+        """
+
+        return sum(self.patientTimeInWaitingRoom)/len(self.patientTimeInWaitingRoom)
+
+    def __get_time_ave(self, path):
+        """
+        :return: time-average of a sample path after the warm-up period
+        """
+
+        duration = self.pathStats[path, STAT_LAST_TIME] - self.warmUpPeriod
+        if duration > 0:
+            return self.pathStats[path, STAT_AREA] / duration
+        else:
+            return 0
+
+    def get_max_n_patients_waiting(self):
+        """
+        :return: maximum number of patients in the waiting room
+        """
+
+        return self.pathStats[PATH_WAITING, STAT_MAX]
+
+    def get_ave_n_patients_waiting(self):
+        """
+        :return: average number of patients in the waiting room
+        """
+
+        return self.__get_time_ave(PATH_WAITING)
+
+    def get_ave_n_patients_in_system(self):
+        """
+        :return: average number of patients in the urgent care
+        """
+
+        return self.__get_time_ave(PATH_IN_SYSTEM)
+
+    def get_ave_n_physicians_busy(self):
+        """
+        :return: average number of physicians busy
+        """
+
+        return self.__get_time_ave(PATH_BUSY)
+
+
+class UrgentCareKernelModel:
+    def __init__(self, id, parameters):
+        """ urgent care model simulated by the array-based kernel (no trace)
+        :param id: ID of this urgent care model (also the seed of the random number generator)
+        :param parameters: parameters of this model (exponential inter-arrival and exam times)
+        """
+
+        self.id = id
+        self.params = parameters    # model parameters
+        self.simOutputs = None      # simulation outputs
+
+    def simulate(self, sim_duration):
+        """ simulate the urgent care
+        :param sim_duration: duration of simulation (hours)
+         """
+
+        # the object engine draws arrival and exam times from one generator in the order the events
+        # are processed; the same stream is produced here by drawing standard exponential variates
+        # from a generator with the same seed (if they run out, draw a longer stream and start over)
+        n_variates = int(4 * self.params.hoursOpen / self.params.arrivalTimeDist.scale) + 1000
+        while True:
+            rng = np.random.RandomState(seed=self.id)
+            variates = rng.standard_exponential(size=n_variates)
+
+            ran_out, n_arrived, n_served, time_in_system, time_in_waiting_room, stats, sim_time = \
+                simulate_kernel(variates, float(sim_duration), float(self.params.hoursOpen),
+                                int(self.params.nPhysicians),
+                                float(self.params.arrivalTimeDist.scale), float(self.params.arrivalTimeDist.loc),
+                                float(self.params.examTimeDist.scale), float(self.params.examTimeDist.loc),
+                                float(D.WARM_UP))
+            if not ran_out:
+                break
+            n_variates *= 2
+
+        self.simOutputs = KernelOutputs(warm_up_period=D.WARM_UP,
+                                        n_patients_arrived=n_arrived,
+                                        n_patients_served=n_served,
+                                        time_in_system=time_in_system,
+                                        time_in_waiting_room=time_in_waiting_room,
+                                        path_stats=stats,
+                                        sim_time=sim_time)
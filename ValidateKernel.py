@@ -0,0 +1,56 @@
+import time
+
+import DESInputData as D
+import ModelParameters as P
+import UrgentCareKernel as K
+import UrgentCareModel as M
+
+N_REPLICATIONS = 5      # number of replications (seeds) to compare
+
+# the trace is not produced by the kernel (and slows down the object engine)
+D.TRACE_ON = False
+
+print('Numba available:', K.NUMBA_AVAILABLE)
+
+# compile the kernel before timing it
+K.UrgentCareKernelModel(id=0, parameters=P.Parameters()).simulate(sim_duration=D.SIM_DURATION)
+
+for i in range(1, N_REPLICATIONS + 1):
+
+    # simulate the urgent care with the object engine
+    start = time.perf_counter()
+    objectModel = M.UrgentCareModel(id=i, parameters=P.Parameters())
+    objectModel.simulate(sim_duration=D.SIM_DURATION)
+    objectTime = time.perf_counter() - start
+
+    # simulate the urgent care with the kernel (same seed, so the same stream of random variates)
+    start = time.perf_counter()
+    kernelModel = K.UrgentCareKernelModel(id=i, parameters=P.Parameters())
+    kernelModel.simulate(sim_duration=D.SIM_DURATION)
+    kernelTime = time.perf_counter() - start
+
+    objectOut = objectModel.simOutputs
+    kernelOut = kernelModel.simOutputs
+
+    # the kernel should reproduce the object engine exactly
+    checks = [
+        ('Patients arrived', objectOut.nPatientsArrived, kernelOut.nPatientsArrived),
+        ('Patients served', objectOut.nPatientsServed, kernelOut.nPatientsServed),
+        ('Patients time in system', objectOut.patientTimeInSystem, kernelOut.patientTimeInSystem),
+        ('Patients time in waiting room', objectOut.patientTimeInWaitingRoom, kernelOut.patientTimeInWaitingRoom),
+        ('Simulation time', objectModel.simCal.time, kernelOut.simTime),
+        ('Maximum number of patients in the waiting room',
+         objectOut.nPatientsWaiting.stat.get_max(), kernelOut.get_max_n_patients_waiting()),
+        ('Average number of patients in the waiting room',
+         objectOut.nPatientsWaiting.stat.get_mean(), kernelOut.get_ave_n_patients_waiting()),
+        ('Average number of patients in the system',
+         objectOut.nPatientInSystem.stat.get_mean(), kernelOut.get_ave_n_patients_in_system()),
+        ('Average number of physicians busy',
+         objectOut.nPhysiciansBusy.stat.get_mean(), kernelOut.get_ave_n_physicians_busy()),
+    ]
+    for name, objectValue, kernelValue in checks:
+        if objectValue != kernelValue:
+            raise ValueError('Replication ' + str(i) + ' | ' + name + ' differs between the object engine and the kernel.')
+
+    print('Replication', i, 'matches.',
+          'Object engine: {0:.4f} s, kernel: {1:.4f} s.'.format(objectTime, kernelTime))